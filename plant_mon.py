@@ -5,17 +5,17 @@ plant_mon.py — Flask Plant Monitoring
 from flask import (
     Flask,
     g,
-    render_template_string,
     request,
     redirect,
     url_for,
     jsonify,
-    send_file,
     abort,
+    Response,
 )
 import sqlite3
 import os
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 import io
 import csv
 
@@ -25,11 +25,28 @@ app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = 4 * 1024 * 1024  # 4 MB
 
 
+# WAL mode is persistent in the database file, so only the first
+# connection of the process needs to issue the journal_mode pragma
+_wal_set = False
+
+
 def get_db():
+    global _wal_set
     db = getattr(g, "_db", None)
     if db is None:
-        db = g._db = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+        # bigger statement cache so the hot INSERT/SELECT strings stay compiled
+        db = g._db = sqlite3.connect(
+            DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=256
+        )
         db.row_factory = sqlite3.Row
+        if not _wal_set:
+            db.execute("PRAGMA journal_mode=WAL")
+            _wal_set = True
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA temp_store=MEMORY")
+        db.execute("PRAGMA mmap_size=134217728")
+        db.execute("PRAGMA cache_size=-20000")
+        db.execute("PRAGMA foreign_keys=ON")
     return db
 
 
@@ -45,7 +62,9 @@ def init_db():
         water_interval_days INTEGER DEFAULT 7,
         notes TEXT,
         created_at TEXT NOT NULL,
-        updated_at TEXT NOT NULL
+        updated_at TEXT NOT NULL,
+        last_watered TEXT,
+        next_watering TEXT
     );
 
     CREATE TABLE IF NOT EXISTS water_logs (
@@ -56,9 +75,34 @@ def init_db():
         FOREIGN KEY(plant_id) REFERENCES plants(id) ON DELETE CASCADE
     );
 
-    CREATE INDEX IF NOT EXISTS idx_water_logs_plant ON water_logs(plant_id);
+    DROP INDEX IF EXISTS idx_water_logs_plant;
+    CREATE INDEX IF NOT EXISTS idx_wlogs_plant_time ON water_logs(plant_id, watered_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_plants_name_nocase ON plants(name COLLATE NOCASE);
     """
     )
+    # one-time migration for databases created before the denormalized
+    # watering columns existed; the trigger below keeps them current
+    cols = {r[1] for r in db.execute("PRAGMA table_info(plants)")}
+    if "last_watered" not in cols:
+        db.execute("ALTER TABLE plants ADD COLUMN last_watered TEXT")
+        db.execute("ALTER TABLE plants ADD COLUMN next_watering TEXT")
+        db.execute(
+            "UPDATE plants SET"
+            " last_watered = (SELECT MAX(watered_at) FROM water_logs w WHERE w.plant_id = plants.id),"
+            " next_watering = strftime('%Y-%m-%dT%H:%M:%S', datetime("
+            "  COALESCE((SELECT MAX(watered_at) FROM water_logs w WHERE w.plant_id = plants.id), created_at),"
+            "  '+' || COALESCE(water_interval_days, 7) || ' days')) || '+00:00'"
+        )
+    db.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_wlog_ins AFTER INSERT ON water_logs"
+        " BEGIN"
+        "  UPDATE plants SET"
+        "   last_watered = NEW.watered_at,"
+        "   next_watering = strftime('%Y-%m-%dT%H:%M:%S', datetime(NEW.watered_at,"
+        "    '+' || COALESCE(water_interval_days, 7) || ' days')) || '+00:00'"
+        "  WHERE id = NEW.plant_id AND (last_watered IS NULL OR NEW.watered_at > last_watered);"
+        " END"
+    )
     db.commit()
 
 
@@ -73,50 +117,15 @@ def now_iso():
     return datetime.now(timezone.utc).isoformat()
 
 
-def parse_iso(s):
-    try:
-        return datetime.fromisoformat(s)
-    except Exception:
+def parse_iso(s, _fromiso=datetime.fromisoformat):
+    # _fromiso bound as a default arg so the hot path is a LOAD_FAST, not
+    # an attribute lookup; 'Z' normalized for pre-3.11 fromisoformat
+    if not s:
         return None
-
-
-def human_delta(future_dt):
-    """Return a short human-friendly delta: 'in 3d', '2d ago', 'today'"""
     try:
-        now = datetime.now(timezone.utc)
-        diff = future_dt - now
-        days = diff.days
-        if abs(days) < 1:
-            return "today"
-        if days > 0:
-            return f"in {days}d"
-        return f"{abs(days)}d ago"
-    except Exception:
-        return ""
-
-
-def get_last_watered(db, plant_id):
-    r = db.execute(
-        "SELECT watered_at FROM water_logs WHERE plant_id = ? ORDER BY watered_at DESC LIMIT 1",
-        (plant_id,),
-    ).fetchone()
-    return r["watered_at"] if r else None
-
-
-def compute_next_watering(db, plant_row):
-    """
-    ISO timestamp for next watering (UTC)
-    """
-    last_iso = get_last_watered(db, plant_row["id"])
-    if last_iso:
-        last = parse_iso(last_iso)
-    else:
-        last = parse_iso(plant_row["created_at"])
-    if last is None:
+        return _fromiso(s[:-1] + "+00:00") if s.endswith("Z") else _fromiso(s)
+    except ValueError:
         return None
-    interval = plant_row["water_interval_days"] or 7
-    next_dt = last + timedelta(days=interval)
-    return next_dt.isoformat()
 
 
 BASE_HTML = r"""
@@ -187,9 +196,9 @@ textarea{min-height:120px;resize:vertical;font-family:monospace}
   </div>
 
   <div class="controls">
-    <a class="btn" href="{{ url_for('index') }}">Dashboard</a>
-    <a class="btn" href="{{ url_for('new_plant') }}">New Plant</a>
-    <button class="btn" onclick="location.href='{{ url_for('export_csv') }}'">Export CSV</button>
+    <a class="btn" href="{{ urls.index }}">Dashboard</a>
+    <a class="btn" href="{{ urls.new }}">New Plant</a>
+    <button class="btn" onclick="location.href='{{ urls.export }}'">Export CSV</button>
     <button class="btn" onclick="clearAll()">Clear All</button>
   </div>
 </div>
@@ -199,7 +208,7 @@ textarea{min-height:120px;resize:vertical;font-family:monospace}
   <div>
     <div class="panel">
       <h3 style="margin-top:0">Quick Add Plant</h3>
-      <form method="post" action="{{ url_for('create_plant') }}">
+      <form method="post" action="{{ urls.create }}">
         <div class="form-row">
           <div style="flex:1">
             <label class="small">Name</label>
@@ -235,14 +244,14 @@ textarea{min-height:120px;resize:vertical;font-family:monospace}
 
         <div style="display:flex;gap:8px">
           <button class="btn primary" type="submit">Add Plant</button>
-          <a class="btn" href="{{ url_for('index') }}">Cancel</a>
+          <a class="btn" href="{{ urls.index }}">Cancel</a>
         </div>
       </form>
     </div>
 
     <div class="panel" style="margin-top:12px">
       <h3 style="margin-top:0">Filters</h3>
-      <form id="filterForm" method="get" action="{{ url_for('index') }}">
+      <form id="filterForm" method="get" action="{{ urls.index }}">
         <label class="small">Search</label>
         <input name="q" placeholder="name, species, location" value="{{ q|default('') }}">
         <label class="small" style="margin-top:8px">Show</label>
@@ -252,7 +261,7 @@ textarea{min-height:120px;resize:vertical;font-family:monospace}
         </select>
         <div style="margin-top:8px;display:flex;gap:8px">
           <button class="btn" type="submit">Apply</button>
-          <a class="btn" href="{{ url_for('index') }}">Reset</a>
+          <a class="btn" href="{{ urls.index }}">Reset</a>
         </div>
       </form>
     </div>
@@ -299,9 +308,9 @@ textarea{min-height:120px;resize:vertical;font-family:monospace}
 
             <div style="margin-left:12px;text-align:right">
               <div style="display:flex;flex-direction:column;gap:8px;align-items:flex-end">
-                <a class="btn" href="{{ url_for('view_plant', plant_id=p.id) }}">Open</a>
-                <a class="btn" href="{{ url_for('edit_plant', plant_id=p.id) }}">Edit</a>
-                <form method="post" action="{{ url_for('delete_plant', plant_id=p.id) }}" style="margin:0">
+                <a class="btn" href="{{ p.url_view }}">Open</a>
+                <a class="btn" href="{{ p.url_edit }}">Edit</a>
+                <form method="post" action="{{ p.url_delete }}" style="margin:0">
                   <button class="btn" type="submit" onclick="return confirm('Delete plant?');">Delete</button>
                 </form>
               </div>
@@ -328,12 +337,12 @@ textarea{min-height:120px;resize:vertical;font-family:monospace}
           <h4 style="margin-bottom:6px">Watering</h4>
           <div class="small">Interval: {{ detail.water_interval_days }} days</div>
           <div style="margin-top:8px;display:flex;gap:8px;align-items:center">
-            <form method="post" action="{{ url_for('log_water', plant_id=detail.id) }}">
+            <form method="post" action="{{ detail.url_water }}">
               <input type="hidden" name="watered_at" value="{{ now_iso }}">
               <input type="text" name="note" placeholder="optional note" style="padding:8px;border-radius:8px;border:1px solid rgba(0,0,0,0.06)">
               <button class="btn primary" type="submit">Log Water Now</button>
             </form>
-            <form method="post" action="{{ url_for('log_water_backdate', plant_id=detail.id) }}" style="display:inline">
+            <form method="post" action="{{ detail.url_water_date }}" style="display:inline">
               <input type="date" name="date" value="{{ today_date }}">
               <button class="btn" type="submit">Log Date</button>
             </form>
@@ -370,82 +379,183 @@ async function clearAll(){
 </html>
 """
 
+# compile once at import; render_template_string would re-lex the source
+# on every cache miss
+_BASE_TMPL = app.jinja_env.from_string(BASE_HTML)
+
+EDIT_HTML = r"""
+<!doctype html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Edit Plant</title>
+<style>
+body{font-family:Inter,system-ui;padding:24px;background:#fbf6f0;color:#333}
+.panel{background:white;padding:18px;border-radius:12px;max-width:720px;margin:24px auto;border:1px solid rgba(0,0,0,0.04)}
+input,textarea{width:100%;padding:10px;border-radius:8px;border:1px solid rgba(0,0,0,0.06);margin-bottom:8px}
+.row{display:flex;gap:8px}
+.btn{padding:10px 12px;border-radius:8px;border:none;cursor:pointer}
+</style>
+</head><body>
+<div class="panel">
+<h2>Edit {{ p.name }}</h2>
+<form method="post" action="{{ url_for('update_plant', plant_id=p.id) }}">
+  <label>Name</label>
+  <input name="name" value="{{ p.name }}" required>
+  <label>Species</label>
+  <input name="species" value="{{ p.species or '' }}">
+  <label>Location</label>
+  <input name="location" value="{{ p.location or '' }}">
+  <label>Water interval days</label>
+  <input name="water_interval_days" type="number" value="{{ p.water_interval_days }}">
+  <label>Notes</label>
+  <textarea name="notes">{{ p.notes or '' }}</textarea>
+  <div style="display:flex;gap:8px">
+    <button class="btn" type="submit" style="background:#b07a2f;color:#111;font-weight:700">Save</button>
+    <a class="btn" href="{{ url_for('index') }}">Cancel</a>
+    <form method="post" action="{{ url_for('delete_plant', plant_id=p.id) }}" style="margin-left:auto" onsubmit="return confirm('Delete?')">
+      <button class="btn" style="background:#ddd">Delete</button>
+    </form>
+  </div>
+</form>
+</div>
+</body></html>
+"""
+
+_EDIT_TMPL = app.jinja_env.from_string(EDIT_HTML)
+
 
 @app.route("/")
 def index():
-    init_db()
     db = get_db()
 
-    # filters
-    q = (request.args.get("q") or "").strip()
-    show = request.args.get("show") or "all"
+    # filters — grab the MultiDict once, and a local alias for the
+    # per-row parse_iso calls below (LOAD_FAST instead of a global lookup)
+    args = request.args
+    q = (args.get("q") or "").strip()
+    show = args.get("show") or "all"
+    detail_id = args.get("detail")
+    _parse_iso = parse_iso
 
-    # build base query
-    rows = db.execute("SELECT * FROM plants ORDER BY name COLLATE NOCASE").fetchall()
-    plants = []
+    # one clock read for the whole request; every per-row computation and the
+    # template context derive from it
     now = datetime.now(timezone.utc)
+    now_local = now.astimezone()
+    now_ts = now.timestamp()
+
+    # build base query — last_watered/next_watering are stored on the plants
+    # row (kept current by the water_logs trigger), and the q/show filters
+    # run in SQL instead of Python
+    where = []
+    params = {}
+    if q:
+        where.append("(p.name LIKE :q OR p.species LIKE :q OR p.location LIKE :q)")
+        params["q"] = f"%{q}%"
+    if show == "due":
+        where.append("datetime(p.next_watering) <= datetime(:now)")
+        params["now"] = now.isoformat()
+    # only the columns the plant card needs; skips dragging notes TEXT
+    # through row materialization
+    sql = (
+        "SELECT p.id, p.name, p.species, p.location, p.water_interval_days,"
+        " p.last_watered, p.next_watering"
+        " FROM plants p"
+    )
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY p.name COLLATE NOCASE"
+    rows = db.execute(sql, params).fetchall()
+    total = db.execute("SELECT COUNT(*) FROM plants").fetchone()[0]
+    plants = []
+
+    # strftime is pricey and timestamps repeat across rows; memoize per request,
+    # keyed by the raw ISO string so identical values format once
+    fmt_cache = {}
+
+    def fmt(iso, spec):
+        key = (iso, spec)
+        v = fmt_cache.get(key)
+        if v is None:
+            dt = _parse_iso(iso)
+            v = fmt_cache[key] = dt.astimezone().strftime(spec) if dt else ""
+        return v
+
     for r in rows:
-        p = dict(r)
-        # last watered
-        last_iso = get_last_watered(db, p["id"])
-        last_dt = parse_iso(last_iso) if last_iso else None
-        p["last_watered_display"] = last_dt.astimezone().strftime("%b %d, %Y %H:%M") if last_dt else None
-        p["created_at"] = parse_iso(p["created_at"]).astimezone().strftime("%b %d, %Y") if p["created_at"] else ""
-        # next watering
-        next_iso = compute_next_watering(db, p)
-        p["next_watering"] = next_iso
-        p["next_watering_dt"] = parse_iso(next_iso) if next_iso else None
-        p["next_due_human"] = human_delta(p["next_watering_dt"]) if p["next_watering_dt"] else ""
-        plants.append(p)
-
-    # apply query filtering
-    def matches(p):
-        if q:
-            ql = q.lower()
-            if ql in (p["name"] or "").lower() or ql in (p.get("species") or "").lower() or ql in (p.get("location") or "").lower():
-                pass
+        # no dict(r) copy — read straight off the Row, keep only the fields
+        # the plant card actually renders
+        last_iso = r["last_watered"]
+        next_iso = r["next_watering"]
+        next_dt = _parse_iso(next_iso) if next_iso else None
+        if next_dt is not None:
+            # 'in 3d' / '2d ago' / 'today' from plain float math; POSIX
+            # floor-division matches timedelta.days rounding
+            delta_days = int((next_dt.timestamp() - now_ts) // 86400)
+            if delta_days == 0:
+                next_human = "today"
+            elif delta_days > 0:
+                next_human = f"in {delta_days}d"
             else:
-                return False
-        if show == "due":
-            if not p["next_watering_dt"]:
-                return False
-            if p["next_watering_dt"] > now:
-                return False
-        return True
-
-    filtered = [p for p in plants if matches(p)]
+                next_human = f"{-delta_days}d ago"
+        else:
+            next_human = ""
+        pid = r["id"]
+        plants.append(
+            SimpleNamespace(
+                id=pid,
+                name=r["name"],
+                species=r["species"],
+                location=r["location"],
+                water_interval_days=r["water_interval_days"],
+                last_watered_display=fmt(last_iso, "%b %d, %Y %H:%M") if last_iso else None,
+                next_watering=next_iso,
+                next_watering_dt=next_dt,
+                next_due_human=next_human,
+                # these routes are static, so plain formatting beats walking
+                # the URL map three times per card
+                url_view=f"/plants/{pid}",
+                url_edit=f"/plants/{pid}/edit",
+                url_delete=f"/plants/{pid}/delete",
+            )
+        )
 
     # detail view (optional)
     detail = None
     logs = []
-    detail_id = request.args.get("detail")
     if detail_id:
         drow = db.execute("SELECT * FROM plants WHERE id = ?", (detail_id,)).fetchone()
         if drow:
             detail = dict(drow)
             detail["created_at"] = parse_iso(detail["created_at"]).astimezone().strftime("%b %d, %Y %H:%M")
+            detail["url_water"] = f"/plants/{detail['id']}/water"
+            detail["url_water_date"] = f"/plants/{detail['id']}/water/date"
             # logs
-            wrows = db.execute("SELECT * FROM water_logs WHERE plant_id = ? ORDER BY watered_at DESC", (detail["id"],)).fetchall()
-            logs = []
-            for w in wrows:
-                wd = dict(w)
-                wd_dt = parse_iso(wd["watered_at"])
-                wd["watered_at_display"] = wd_dt.astimezone().strftime("%b %d, %Y %H:%M") if wd_dt else wd["watered_at"]
-                logs.append(wd)
-
-    return render_template_string(
-        BASE_HTML,
-        plants=filtered,
-        total=len(plants),
-        plant_count=len(filtered),
+            wrows = db.execute("SELECT watered_at, note FROM water_logs WHERE plant_id = ? ORDER BY watered_at DESC", (detail["id"],)).fetchall()
+            logs = [
+                SimpleNamespace(
+                    watered_at_display=fmt(w["watered_at"], "%b %d, %Y %H:%M") or w["watered_at"],
+                    note=w["note"],
+                )
+                for w in wrows
+            ]
+
+    # static URLs resolved once per request instead of per template reference
+    urls = {
+        "index": url_for("index"),
+        "new": url_for("new_plant"),
+        "export": url_for("export_csv"),
+        "create": url_for("create_plant"),
+    }
+
+    return _BASE_TMPL.render(
+        urls=urls,
+        plants=plants,
+        total=total,
+        plant_count=len(plants),
         detail=detail,
         logs=logs,
-        now=datetime.now().strftime("%b %d, %Y %H:%M"),
-        now_iso=now_iso(),
+        now=now_local.strftime("%b %d, %Y %H:%M"),
+        now_iso=now.isoformat(),
         q=q,
         show=show,
-        today_date=datetime.now().strftime("%Y-%m-%d"),
-        now_dt=datetime.now(timezone.utc),
+        today_date=now_local.strftime("%Y-%m-%d"),
+        now_dt=now,
     )
 
 
@@ -456,7 +566,6 @@ def new_plant():
 
 @app.route("/plants/create", methods=["POST"])
 def create_plant():
-    init_db()
     db = get_db()
     name = (request.form.get("name") or "").strip()
     if not name:
@@ -469,18 +578,19 @@ def create_plant():
     except Exception:
         interval = 7
     notes = request.form.get("notes") or ""
-    now = now_iso()
-    db.execute(
-        "INSERT INTO plants (name,species,location,water_interval_days,notes,created_at,updated_at) VALUES (?,?,?,?,?,?,?)",
-        (name, species, location, interval, notes, now, now),
-    )
-    db.commit()
+    now_dt = datetime.now(timezone.utc)
+    now = now_dt.isoformat()
+    next_iso = (now_dt + timedelta(days=interval)).isoformat()
+    with db:
+        db.execute(
+            "INSERT INTO plants (name,species,location,water_interval_days,notes,created_at,updated_at,next_watering) VALUES (?,?,?,?,?,?,?,?)",
+            (name, species, location, interval, notes, now, now, next_iso),
+        )
     return redirect(url_for("index"))
 
 
 @app.route("/plants/<int:plant_id>")
 def view_plant(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
@@ -490,56 +600,17 @@ def view_plant(plant_id):
 
 @app.route("/plants/<int:plant_id>/edit")
 def edit_plant(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
         abort(404)
     p = dict(row)
     p["created_at"] = parse_iso(p["created_at"]).astimezone().strftime("%b %d, %Y %H:%M")
-    return render_template_string(
-        """
-        <!doctype html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
-        <title>Edit Plant</title>
-        <style>
-        body{font-family:Inter,system-ui;padding:24px;background:#fbf6f0;color:#333}
-        .panel{background:white;padding:18px;border-radius:12px;max-width:720px;margin:24px auto;border:1px solid rgba(0,0,0,0.04)}
-        input,textarea{width:100%;padding:10px;border-radius:8px;border:1px solid rgba(0,0,0,0.06);margin-bottom:8px}
-        .row{display:flex;gap:8px}
-        .btn{padding:10px 12px;border-radius:8px;border:none;cursor:pointer}
-        </style>
-        </head><body>
-        <div class="panel">
-        <h2>Edit {{ p.name }}</h2>
-        <form method="post" action="{{ url_for('update_plant', plant_id=p.id) }}">
-          <label>Name</label>
-          <input name="name" value="{{ p.name }}" required>
-          <label>Species</label>
-          <input name="species" value="{{ p.species or '' }}">
-          <label>Location</label>
-          <input name="location" value="{{ p.location or '' }}">
-          <label>Water interval days</label>
-          <input name="water_interval_days" type="number" value="{{ p.water_interval_days }}">
-          <label>Notes</label>
-          <textarea name="notes">{{ p.notes or '' }}</textarea>
-          <div style="display:flex;gap:8px">
-            <button class="btn" type="submit" style="background:#b07a2f;color:#111;font-weight:700">Save</button>
-            <a class="btn" href="{{ url_for('index') }}">Cancel</a>
-            <form method="post" action="{{ url_for('delete_plant', plant_id=p.id) }}" style="margin-left:auto" onsubmit="return confirm('Delete?')">
-              <button class="btn" style="background:#ddd">Delete</button>
-            </form>
-          </div>
-        </form>
-        </div>
-        </body></html>
-        """,
-        p=p,
-    )
+    return _EDIT_TMPL.render(p=p)
 
 
 @app.route("/plants/<int:plant_id>/update", methods=["POST"])
 def update_plant(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
@@ -554,27 +625,27 @@ def update_plant(plant_id):
         interval = 7
     notes = request.form.get("notes") or ""
     now = now_iso()
-    db.execute(
-        "UPDATE plants SET name=?,species=?,location=?,water_interval_days=?,notes=?,updated_at=? WHERE id=?",
-        (name, species, location, interval, notes, now, plant_id),
-    )
-    db.commit()
+    with db:
+        db.execute(
+            "UPDATE plants SET name=?,species=?,location=?,water_interval_days=?,notes=?,updated_at=?,"
+            " next_watering = strftime('%Y-%m-%dT%H:%M:%S', datetime(COALESCE(last_watered, created_at),"
+            "  '+' || ? || ' days')) || '+00:00' WHERE id=?",
+            (name, species, location, interval, notes, now, interval, plant_id),
+        )
     return redirect(url_for("index", detail=plant_id))
 
 
 @app.route("/plants/<int:plant_id>/delete", methods=["POST"])
 def delete_plant(plant_id):
-    init_db()
     db = get_db()
-    db.execute("DELETE FROM plants WHERE id = ?", (plant_id,))
-    db.execute("DELETE FROM water_logs WHERE plant_id = ?", (plant_id,))
-    db.commit()
+    # ON DELETE CASCADE removes the water_logs rows now that FKs are on
+    with db:
+        db.execute("DELETE FROM plants WHERE id = ?", (plant_id,))
     return redirect(url_for("index"))
 
 
 @app.route("/plants/<int:plant_id>/water", methods=["POST"])
 def log_water(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
@@ -585,60 +656,76 @@ def log_water(plant_id):
         _ = parse_iso(watered_at)
     except Exception:
         watered_at = now_iso()
-    db.execute("INSERT INTO water_logs (plant_id,watered_at,note) VALUES (?,?,?)", (plant_id, watered_at, note))
-    db.commit()
+    with db:
+        db.execute("INSERT INTO water_logs (plant_id,watered_at,note) VALUES (?,?,?)", (plant_id, watered_at, note))
     return redirect(url_for("index", detail=plant_id))
 
 
 @app.route("/plants/<int:plant_id>/water/date", methods=["POST"])
 def log_water_backdate(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
         abort(404)
-    date_str = request.form.get("date")
+    # input comes from <input type=date>, so the format is fixed
+    date_str = request.form.get("date") or ""
     try:
-        dt = datetime.fromisoformat(date_str)
-        watered_at = dt.replace(tzinfo=timezone.utc).isoformat()
-    except Exception:
+        watered_at = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc).isoformat()
+    except ValueError:
         watered_at = now_iso()
     note = request.form.get("note") or ("backdated")
-    db.execute("INSERT INTO water_logs (plant_id,watered_at,note) VALUES (?,?,?)", (plant_id, watered_at, note))
-    db.commit()
+    with db:
+        db.execute("INSERT INTO water_logs (plant_id,watered_at,note) VALUES (?,?,?)", (plant_id, watered_at, note))
     return redirect(url_for("index", detail=plant_id))
 
 
 @app.route("/export.csv")
 def export_csv():
-    init_db()
-    db = get_db()
-    plants = db.execute("SELECT * FROM plants ORDER BY name").fetchall()
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["id", "name", "species", "location", "water_interval_days", "created_at", "updated_at", "last_watered", "next_watering"])
-    for p in plants:
-        p = dict(p)
-        last_iso = get_last_watered(db, p["id"])
-        next_iso = compute_next_watering(db, p)
-        writer.writerow([p["id"], p["name"], p["species"], p["location"], p["water_interval_days"], p["created_at"], p["updated_at"], last_iso or "", next_iso or ""])
-    buf.seek(0)
-    return send_file(io.BytesIO(buf.getvalue().encode("utf-8")), mimetype="text/csv", as_attachment=True, download_name="plants_export.csv")
+    def generate():
+        # own connection: the request's g._db is closed by teardown before
+        # the response body is iterated
+        db = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+        db.row_factory = sqlite3.Row
+        try:
+            cur = db.execute(
+                "SELECT id, name, species, location, water_interval_days, created_at, updated_at,"
+                " last_watered, next_watering FROM plants ORDER BY name"
+            )
+            # one small buffer reused per row; rows are yielded as they are read
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(["id", "name", "species", "location", "water_interval_days", "created_at", "updated_at", "last_watered", "next_watering"])
+            yield buf.getvalue()
+            for p in cur:
+                buf.seek(0)
+                buf.truncate()
+                writer.writerow([p["id"], p["name"], p["species"], p["location"], p["water_interval_days"], p["created_at"], p["updated_at"], p["last_watered"] or "", p["next_watering"] or ""])
+                yield buf.getvalue()
+        finally:
+            db.close()
+
+    return Response(
+        generate(),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=plants_export.csv"},
+    )
 
 
 @app.route("/api/plants", methods=["GET", "POST"])
 def api_plants():
-    init_db()
     db = get_db()
     if request.method == "GET":
-        rows = db.execute("SELECT * FROM plants ORDER BY name").fetchall()
-        out = []
-        for r in rows:
-            p = dict(r)
-            p["last_watered"] = get_last_watered(db, p["id"])
-            p["next_watering"] = compute_next_watering(db, p)
-            out.append(p)
-        return jsonify(out)
+        # the whole payload is assembled by SQLite's json functions; the
+        # handler just relays one TEXT cell, no per-row dicts or jsonify
+        row = db.execute(
+            "SELECT json_group_array(json_object("
+            " 'id', id, 'name', name, 'species', species, 'location', location,"
+            " 'water_interval_days', water_interval_days, 'notes', notes,"
+            " 'created_at', created_at, 'updated_at', updated_at,"
+            " 'last_watered', last_watered, 'next_watering', next_watering"
+            ")) AS payload FROM (SELECT * FROM plants ORDER BY name)"
+        ).fetchone()
+        return Response(row["payload"], mimetype="application/json")
     else:
         data = request.get_json(force=True)
         name = (data.get("name") or "").strip()
@@ -652,30 +739,27 @@ def api_plants():
         except Exception:
             interval = 7
         notes = data.get("notes") or ""
-        now = now_iso()
-        cur = db.execute("INSERT INTO plants (name,species,location,water_interval_days,notes,created_at,updated_at) VALUES (?,?,?,?,?,?,?)",
-            (name, species, location, interval, notes, now, now))
-        db.commit()
+        now_dt = datetime.now(timezone.utc)
+        now = now_dt.isoformat()
+        next_iso = (now_dt + timedelta(days=interval)).isoformat()
+        with db:
+            cur = db.execute("INSERT INTO plants (name,species,location,water_interval_days,notes,created_at,updated_at,next_watering) VALUES (?,?,?,?,?,?,?,?)",
+                (name, species, location, interval, notes, now, now, next_iso))
         pid = cur.lastrowid
         return jsonify({"id": pid}), 201
 
 
 @app.route("/api/plants/<int:plant_id>", methods=["GET", "PUT", "DELETE"])
 def api_plant(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
         return jsonify({"error": "not found"}), 404
     if request.method == "GET":
-        p = dict(row)
-        p["last_watered"] = get_last_watered(db, plant_id)
-        p["next_watering"] = compute_next_watering(db, p)
-        return jsonify(p)
+        return jsonify(dict(row))
     if request.method == "DELETE":
-        db.execute("DELETE FROM plants WHERE id = ?", (plant_id,))
-        db.execute("DELETE FROM water_logs WHERE plant_id = ?", (plant_id,))
-        db.commit()
+        with db:
+            db.execute("DELETE FROM plants WHERE id = ?", (plant_id,))
         return jsonify({"ok": True})
     data = request.get_json(force=True)
     name = (data.get("name") or row["name"]).strip()
@@ -688,15 +772,16 @@ def api_plant(plant_id):
         interval = row["water_interval_days"]
     notes = data.get("notes", row["notes"])
     now = now_iso()
-    db.execute("UPDATE plants SET name=?,species=?,location=?,water_interval_days=?,notes=?,updated_at=? WHERE id=?",
-               (name, species, location, interval, notes, now, plant_id))
-    db.commit()
+    with db:
+        db.execute("UPDATE plants SET name=?,species=?,location=?,water_interval_days=?,notes=?,updated_at=?,"
+                   " next_watering = strftime('%Y-%m-%dT%H:%M:%S', datetime(COALESCE(last_watered, created_at),"
+                   "  '+' || ? || ' days')) || '+00:00' WHERE id=?",
+                   (name, species, location, interval, notes, now, interval, plant_id))
     return jsonify({"ok": True})
 
 
 @app.route("/api/plants/<int:plant_id>/water", methods=["POST"])
 def api_log_water(plant_id):
-    init_db()
     db = get_db()
     row = db.execute("SELECT * FROM plants WHERE id = ?", (plant_id,)).fetchone()
     if not row:
@@ -709,22 +794,25 @@ def api_log_water(plant_id):
         _ = parse_iso(watered_at)
     except Exception:
         watered_at = now_iso()
-    db.execute("INSERT INTO water_logs (plant_id,watered_at,note) VALUES (?,?,?)", (plant_id, watered_at, note))
-    db.commit()
+    with db:
+        db.execute("INSERT INTO water_logs (plant_id,watered_at,note) VALUES (?,?,?)", (plant_id, watered_at, note))
     return jsonify({"ok": True})
 
 
 @app.route("/api/clear", methods=["POST"])
 def api_clear():
-    init_db()
     db = get_db()
-    deleted_logs = db.execute("DELETE FROM water_logs").rowcount
-    deleted_plants = db.execute("DELETE FROM plants").rowcount
-    db.commit()
+    with db:
+        deleted_logs = db.execute("DELETE FROM water_logs").rowcount
+        deleted_plants = db.execute("DELETE FROM plants").rowcount
     return jsonify({"status": "ok", "deleted_plants": deleted_plants, "deleted_logs": deleted_logs})
 
 
+# create tables once at import; every statement is IF NOT EXISTS so this
+# stays idempotent across restarts
+with app.app_context():
+    init_db()
+
+
 if __name__ == "__main__":
-    with app.app_context():
-        init_db()
     app.run(host="0.0.0.0", port=5019, debug=True)